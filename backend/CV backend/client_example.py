@@ -4,25 +4,51 @@ Run the backend first: python main.py
 Then run this script: python client_example.py
 """
 import requests
-import json
-from typing import Dict
+import orjson
+from typing import Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 API_URL = "http://localhost:8000"
+REQUEST_TIMEOUT = (3, 30)  # (connect, read) seconds
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 class CoverLetterClient:
     def __init__(self, base_url: str = API_URL):
         self.base_url = base_url
+        
+        # Reuse keep-alive connections across calls instead of a new
+        # TCP handshake per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def health_check(self) -> Dict:
         """Check if API is running"""
-        response = requests.get(f"{self.base_url}/health")
-        return response.json()
+        response = self.session.get(f"{self.base_url}/health", timeout=REQUEST_TIMEOUT)
+        return orjson.loads(response.content)
     
     def get_available_roles(self) -> list:
         """Get all available roles"""
-        response = requests.get(f"{self.base_url}/roles")
-        return response.json()['roles']
+        response = self.session.get(f"{self.base_url}/roles", timeout=REQUEST_TIMEOUT)
+        return orjson.loads(response.content)['roles']
     
     def generate_cover_letter(
         self,
@@ -43,12 +69,14 @@ class CoverLetterClient:
             "top_k": top_k
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/generate-cover-letter",
-            json=payload
+            data=orjson.dumps(payload),
+            headers=JSON_HEADERS,
+            timeout=REQUEST_TIMEOUT
         )
         
-        return response.json()
+        return orjson.loads(response.content)
     
     def generate_with_context(
         self,
@@ -67,54 +95,55 @@ class CoverLetterClient:
             "top_k": top_k
         }
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/generate-cover-letter-with-context",
-            json=payload
+            data=orjson.dumps(payload),
+            headers=JSON_HEADERS,
+            timeout=REQUEST_TIMEOUT
         )
         
-        return response.json()
+        return orjson.loads(response.content)
+    
+    def generate_both(
+        self,
+        resume_content: str,
+        job_description: str,
+        company_name: str,
+        job_role: str,
+        experience_type: str = "experienced",
+        top_k: int = 5,
+        context_top_k: int = 3
+    ) -> Tuple[Dict, Dict]:
+        """
+        Call both generate endpoints concurrently over the pooled session
+        Returns: (cover letter result, detailed context result)
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fut_letter = executor.submit(
+                self.generate_cover_letter,
+                resume_content, job_description, company_name, job_role,
+                experience_type, top_k
+            )
+            fut_context = executor.submit(
+                self.generate_with_context,
+                resume_content, job_description, company_name, job_role,
+                context_top_k
+            )
+            return fut_letter.result(), fut_context.result()
     
     def get_context_by_role(self, role: str, limit: int = 5) -> Dict:
         """Get context chunks for a specific role"""
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/context-by-role/{role}",
-            params={"limit": limit}
+            params={"limit": limit},
+            timeout=REQUEST_TIMEOUT
         )
-        return response.json()
+        return orjson.loads(response.content)
 
 
-def main():
-    print("\n" + "="*70)
-    print("🎯 Cover Letter Generator - Example Client")
-    print("="*70 + "\n")
-    
-    client = CoverLetterClient()
-    
-    # 1. Health Check
-    print("1️⃣ Health Check")
-    print("-" * 70)
-    try:
-        health = client.health_check()
-        print(f"Status: {health['status']}")
-        print(f"Index Loaded: {health['index_loaded']}")
-        print(f"Timestamp: {health['timestamp']}\n")
-    except Exception as e:
-        print(f"❌ API not running. Start server with: python main.py")
-        print(f"Error: {e}\n")
-        return
-    
-    # 2. Get Available Roles
-    print("2️⃣ Available Roles")
-    print("-" * 70)
-    roles = client.get_available_roles()
-    print(f"Total roles: {len(roles)}")
-    print(f"Sample roles: {roles[:5]}\n")
-    
-    # 3. Example Data
-    print("3️⃣ Generating Cover Letter Example")
-    print("-" * 70)
-    
-    sample_resume = """
+# Example request data, sent verbatim (module level so refactors of main()
+# cannot change its indentation)
+SAMPLE_RESUME = """
     JOHN DOE
     Senior Software Engineer
     john.doe@example.com | +1-234-567-8900
@@ -142,8 +171,8 @@ def main():
     Tools: Docker, Kubernetes, AWS, Jenkins, Git
     Databases: PostgreSQL, MongoDB, Redis
     """
-    
-    sample_jd = """
+
+SAMPLE_JD = """
     Senior Software Engineer - Backend
     Company: Tech Corp
     
@@ -168,64 +197,88 @@ def main():
     - Experience with machine learning systems
     - Knowledge of distributed systems
     """
+
+def main():
+    print("\n" + "="*70)
+    print("🎯 Cover Letter Generator - Example Client")
+    print("="*70 + "\n")
+    
+    with CoverLetterClient() as client:
+        # 1. Health Check
+        print("1️⃣ Health Check")
+        print("-" * 70)
+        try:
+            health = client.health_check()
+            print(f"Status: {health['status']}")
+            print(f"Index Loaded: {health['index_loaded']}")
+            print(f"Timestamp: {health['timestamp']}\n")
+        except Exception as e:
+            print(f"❌ API not running. Start server with: python main.py")
+            print(f"Error: {e}\n")
+            return
     
-    # Generate cover letter
-    print("Generating cover letter...\n")
-    
-    result = client.generate_cover_letter(
-        resume_content=sample_resume,
-        job_description=sample_jd,
-        company_name="Tech Corp",
-        job_role="Senior Software Engineer",
-        experience_type="experienced",
-        top_k=5
-    )
-    
-    if result['success']:
-        print("✅ Cover Letter Generated Successfully\n")
-        print("GENERATED COVER LETTER:")
+        # 2. Get Available Roles
+        print("2️⃣ Available Roles")
         print("-" * 70)
-        print(result['cover_letter'])
+        roles = client.get_available_roles()
+        print(f"Total roles: {len(roles)}")
+        print(f"Sample roles: {roles[:5]}\n")
+    
+        # 3. Example Data
+        print("3️⃣ Generating Cover Letter Example")
         print("-" * 70)
-        print(f"\nWord Count: {result['word_count']}")
-        print(f"Retrieved Context Chunks: {result['retrieved_context_count']}")
-        print(f"Generated at: {result['generation_timestamp']}\n")
-    else:
-        print(f"❌ Generation failed: {result['error']}\n")
-    
-    # 4. Test with context
-    print("4️⃣ Detailed Context Retrieval")
-    print("-" * 70)
-    
-    context_result = client.generate_with_context(
-        resume_content=sample_resume,
-        job_description=sample_jd,
-        company_name="Tech Corp",
-        job_role="Senior Software Engineer",
-        top_k=3
-    )
-    
-    if context_result['success']:
-        print(f"Retrieved {len(context_result['retrieved_context'])} context chunks:\n")
-        for i, chunk in enumerate(context_result['retrieved_context'], 1):
-            print(f"{i}. Source: {chunk['source']} | Role: {chunk['role']}")
-            print(f"   Similarity: {chunk['similarity_score']:.2f}")
-            print(f"   Text: {chunk['text'][:100]}...\n")
-    
-    # 5. Get role-specific context
-    print("5️⃣ Role-Specific Context")
-    print("-" * 70)
-    
-    try:
-        role_context = client.get_context_by_role("software_engineer", limit=3)
-        print(f"Role: {role_context['role']}")
-        print(f"Retrieved {role_context['context_count']} contexts\n")
-    except Exception as e:
-        print(f"Note: {e}\n")
-    
-    print("="*70)
-    print("✅ Example completed!")
-    print("="*70 + "\n")
+    
+        # Generate cover letter
+        print("Generating cover letter...\n")
+    
+        # Both generate endpoints are independent; issue them in parallel
+        result, context_result = client.generate_both(
+            resume_content=SAMPLE_RESUME,
+            job_description=SAMPLE_JD,
+            company_name="Tech Corp",
+            job_role="Senior Software Engineer",
+            experience_type="experienced",
+            top_k=5,
+            context_top_k=3
+        )
+    
+        if result['success']:
+            print("✅ Cover Letter Generated Successfully\n")
+            print("GENERATED COVER LETTER:")
+            print("-" * 70)
+            print(result['cover_letter'])
+            print("-" * 70)
+            print(f"\nWord Count: {result['word_count']}")
+            print(f"Retrieved Context Chunks: {result['retrieved_context_count']}")
+            print(f"Generated at: {result['generation_timestamp']}\n")
+        else:
+            print(f"❌ Generation failed: {result['error']}\n")
+    
+        # 4. Test with context
+        print("4️⃣ Detailed Context Retrieval")
+        print("-" * 70)
+    
+        if context_result['success']:
+            print(f"Retrieved {len(context_result['retrieved_context'])} context chunks:\n")
+            for i, chunk in enumerate(context_result['retrieved_context'], 1):
+                print(f"{i}. Source: {chunk['source']} | Role: {chunk['role']}")
+                print(f"   Similarity: {chunk['similarity_score']:.2f}")
+                print(f"   Text: {chunk['text'][:100]}...\n")
+    
+        # 5. Get role-specific context
+        print("5️⃣ Role-Specific Context")
+        print("-" * 70)
+    
+        try:
+            role_context = client.get_context_by_role("software_engineer", limit=3)
+            print(f"Role: {role_context['role']}")
+            print(f"Retrieved {role_context['context_count']} contexts\n")
+        except Exception as e:
+            print(f"Note: {e}\n")
+    
+        print("="*70)
+        print("✅ Example completed!")
+        print("="*70 + "\n")
 
 
 if __name__ == "__main__":
@@ -9,25 +9,70 @@ load_dotenv()
 # API Configuration
 API_HOST = os.environ.get("API_HOST", "0.0.0.0")
 API_PORT = int(os.environ.get("API_PORT", 8000))
+# Server processes; each loads the model and memory-maps the shared FAISS index
+API_WORKERS = int(os.environ.get("API_WORKERS", min(4, os.cpu_count() or 1)))
 DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 
 # LLM Configuration
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-3.5-turbo")
 MAX_TOKENS = int(os.environ.get("MAX_TOKENS", 600))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30.0))
+# Sent as prompt_cache_key so requests sharing the system prompt hit the same
+# provider-side prompt cache. Empty (default) omits it: OpenAI-compatible
+# endpoints that reject unknown fields (Azure, proxies) would return 400
+PROMPT_CACHE_KEY = os.environ.get("PROMPT_CACHE_KEY", "")
 
 # Embedding Configuration
 EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 EMBEDDING_DIMENSION = 384
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 128))
+OPENAI_EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+OPENAI_EMBEDDING_BATCH_SIZE = int(os.environ.get("OPENAI_EMBEDDING_BATCH_SIZE", 100))
+OPENAI_EMBEDDING_CONCURRENCY = int(os.environ.get("OPENAI_EMBEDDING_CONCURRENCY", 8))
 
 # RAG Configuration
 TOP_K_CHUNKS = int(os.environ.get("TOP_K_CHUNKS", 5))
 CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", 500))
 
+# FAISS Index Configuration
+# "auto" picks HNSW over int8 (SQ8) vectors for small corpora and IVF-PQ
+# (~4*sqrt(n) lists) above FAISS_HNSW_MAX_VECTORS; any other value is passed
+# to faiss.index_factory as-is
+FAISS_INDEX_TYPE = os.environ.get("FAISS_INDEX_TYPE", "auto")
+FAISS_HNSW_MAX_VECTORS = int(os.environ.get("FAISS_HNSW_MAX_VECTORS", 10000))
+# Vector encoding for the auto IVF index: "PQ" (smallest) or "SQ8" (int8, higher recall)
+FAISS_IVF_ENCODING = os.environ.get("FAISS_IVF_ENCODING", "PQ")
+FAISS_EF_CONSTRUCTION = int(os.environ.get("FAISS_EF_CONSTRUCTION", 200))
+FAISS_EF_SEARCH = int(os.environ.get("FAISS_EF_SEARCH", 64))
+FAISS_NPROBE = int(os.environ.get("FAISS_NPROBE", 8))
+# Search queries that are already queued together as one batch (up to
+# FAISS_MAX_BATCH); never waits for more. Off by default: single HNSW
+# searches are ~20 µs, so batching only pays off under heavy concurrency
+FAISS_BATCH_QUERIES = os.environ.get("FAISS_BATCH_QUERIES", "False").lower() == "true"
+FAISS_MAX_BATCH = int(os.environ.get("FAISS_MAX_BATCH", 32))
+# Search a GPU copy of the index (faiss-gpu builds only) once it holds this many vectors
+FAISS_USE_GPU = os.environ.get("FAISS_USE_GPU", "True").lower() == "true"
+FAISS_GPU_MIN_VECTORS = int(os.environ.get("FAISS_GPU_MIN_VECTORS", 100000))
+
 # Data Paths
 DATA_DIR = os.environ.get("DATA_DIR", "./")
 FAISS_INDEX_PATH = os.path.join(DATA_DIR, "faiss_index")
-METADATA_PATH = os.path.join(DATA_DIR, "metadata.pkl")
+METADATA_PATH = os.path.join(DATA_DIR, "metadata.parquet")
+LEGACY_METADATA_PATH = os.path.join(DATA_DIR, "metadata.pkl")  # read if no Parquet store exists
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", os.path.join(DATA_DIR, "emb_cache"))
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 10000))
+# Rows kept in the on-disk cache; least recently used rows are pruned beyond it
+EMBEDDING_DISK_CACHE_SIZE = int(os.environ.get("EMBEDDING_DISK_CACHE_SIZE", 200000))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+
+# Response Cache (identical generate requests are served from memory)
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+
+# Retrieved-context cache (same role/company/top_k reuses the FAISS results)
+CONTEXT_CACHE_SIZE = int(os.environ.get("CONTEXT_CACHE_SIZE", 256))
+CONTEXT_CACHE_TTL = int(os.environ.get("CONTEXT_CACHE_TTL", 3600))
 
 # Cover Letter Rules
 MIN_WORD_COUNT = 200
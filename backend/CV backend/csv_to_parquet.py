@@ -0,0 +1,35 @@
+"""
+One-time conversion of the data CSVs to Parquet
+DataLoader reads the .parquet files when present, skipping CSV parsing on startup
+Run after updating any CSV: python csv_to_parquet.py
+"""
+import os
+import sys
+
+from config import DATA_DIR
+from data_loader import DataLoader, DATA_FILES, CATEGORY_COLUMNS
+
+def convert(data_dir: str = DATA_DIR) -> bool:
+    """Convert every data CSV in data_dir to a zstd-compressed Parquet file"""
+    print("\n📦 Converting CSV files to Parquet...")
+    
+    for csv_name in DATA_FILES.values():
+        csv_path = os.path.join(data_dir, csv_name)
+        if not os.path.exists(csv_path):
+            print(f"   ✗ {csv_name} NOT FOUND")
+            return False
+        
+        df = DataLoader._read_csv(csv_path)
+        df = df.astype({col: 'category' for col in CATEGORY_COLUMNS if col in df.columns})
+        
+        parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+        df.to_parquet(parquet_path, compression='zstd')
+        
+        size = os.path.getsize(parquet_path) / (1024 * 1024)  # MB
+        print(f"   ✓ {os.path.basename(parquet_path)} ({size:.2f} MB)")
+    
+    return True
+
+if __name__ == "__main__":
+    if not convert():
+        sys.exit(1)
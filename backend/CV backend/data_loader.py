@@ -2,8 +2,19 @@
 Data loader module to read and process CSV files
 """
 import pandas as pd
+import numpy as np
 from typing import Dict, List, Tuple
 import os
+from utils import split_into_sentence_chunks
+
+# Source CSV files; csv_to_parquet.py writes a .parquet next to each
+DATA_FILES = {
+    'resumes': "resumes_validated (1).csv",
+    'jd': "jd_validated.csv",
+    'skills': "skill_role_master.csv",
+    'covers': "covers_validated.csv",
+}
+CATEGORY_COLUMNS = ['role', 'experience_type']
 
 class DataLoader:
     def __init__(self, data_dir: str = "./"):
@@ -13,36 +24,84 @@ class DataLoader:
         self.skills_df = None
         self.covers_df = None
         
+        # Lowercased role -> positional row indices, built once at load time
+        self._resume_by_role = {}
+        self._jd_by_role = {}
+        self._skills_by_role = {}
+        self._covers_by_role = {}
+        self._unique_roles = []
+        
+    def _read_table(self, csv_name: str) -> pd.DataFrame:
+        """Read the Parquet copy of a CSV when it is present and up to date, else the CSV"""
+        csv_path = os.path.join(self.data_dir, csv_name)
+        parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+        
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path)
+            or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        ):
+            try:
+                return pd.read_parquet(parquet_path)
+            except ImportError:
+                pass  # pyarrow not installed; use the CSV
+        
+        return self._read_csv(csv_path)
+    
+    @staticmethod
+    def _read_csv(csv_path: str) -> pd.DataFrame:
+        """Parse a CSV with pyarrow's multithreaded reader, falling back to the C parser"""
+        try:
+            return pd.read_csv(csv_path, engine="pyarrow")
+        except ImportError:
+            return pd.read_csv(csv_path)
+    
     def load_all_data(self) -> None:
-        """Load all CSV files"""
-        self.resumes_df = pd.read_csv(os.path.join(self.data_dir, "resumes_validated (1).csv"))
-        self.jd_df = pd.read_csv(os.path.join(self.data_dir, "jd_validated.csv"))
-        self.skills_df = pd.read_csv(os.path.join(self.data_dir, "skill_role_master.csv"))
-        self.covers_df = pd.read_csv(os.path.join(self.data_dir, "covers_validated.csv"))
+        """Load all data files (Parquet if converted, CSV otherwise)"""
+        self.resumes_df = self._read_table(DATA_FILES['resumes'])
+        self.jd_df = self._read_table(DATA_FILES['jd'])
+        self.skills_df = self._read_table(DATA_FILES['skills'])
+        self.covers_df = self._read_table(DATA_FILES['covers'])
+        
+        self._resume_by_role = self._build_role_index(self.resumes_df)
+        self._jd_by_role = self._build_role_index(self.jd_df)
+        self._skills_by_role = self._build_role_index(self.skills_df)
+        self._covers_by_role = self._build_role_index(self.covers_df)
+        self._unique_roles = self._compute_unique_roles()
         
         print("✓ All CSV files loaded successfully")
         
-    def get_resume_by_role(self, role: str, experience_type: str = None) -> List[Dict]:
-        """Get resume content by role"""
-        query = self.resumes_df[self.resumes_df['role'].str.lower() == role.lower()]
+    @staticmethod
+    def _build_role_index(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Map lowercased role to the positional indices of its rows"""
+        return df.groupby(df['role'].str.lower()).indices
+    
+    @staticmethod
+    def _select_by_role(
+        df: pd.DataFrame,
+        role_index: Dict[str, np.ndarray],
+        role: str,
+        experience_type: str = None
+    ) -> pd.DataFrame:
+        """Rows for a role (hash lookup), optionally narrowed by experience type"""
+        query = df.iloc[role_index.get(role.lower(), [])]
         if experience_type:
             query = query[query['experience_type'].str.lower() == experience_type.lower()]
         
+        return query
+    
+    def get_resume_by_role(self, role: str, experience_type: str = None) -> List[Dict]:
+        """Get resume content by role"""
+        query = self._select_by_role(self.resumes_df, self._resume_by_role, role, experience_type)
         return query.to_dict('records')
     
     def get_jd_by_role(self, role: str, experience_type: str = None) -> List[Dict]:
         """Get job descriptions by role"""
-        query = self.jd_df[self.jd_df['role'].str.lower() == role.lower()]
-        if experience_type:
-            query = query[query['experience_type'].str.lower() == experience_type.lower()]
-        
+        query = self._select_by_role(self.jd_df, self._jd_by_role, role, experience_type)
         return query.to_dict('records')
     
     def get_skills_by_role(self, role: str, experience_type: str = None) -> Dict:
         """Get skills mapping for a role"""
-        query = self.skills_df[self.skills_df['role'].str.lower() == role.lower()]
-        if experience_type:
-            query = query[query['experience_type'].str.lower() == experience_type.lower()]
+        query = self._select_by_role(self.skills_df, self._skills_by_role, role, experience_type)
         
         if not query.empty:
             return query.iloc[0].to_dict()
@@ -50,62 +109,97 @@ class DataLoader:
     
     def get_cover_templates(self, role: str, experience_type: str = None) -> List[Dict]:
         """Get cover letter templates by role"""
-        query = self.covers_df[self.covers_df['role'].str.lower() == role.lower()]
-        if experience_type:
-            query = query[query['experience_type'].str.lower() == experience_type.lower()]
-        
+        query = self._select_by_role(self.covers_df, self._covers_by_role, role, experience_type)
         return query.to_dict('records')
     
+    def _compute_unique_roles(self) -> List[str]:
+        """Sorted union of roles across resumes, JDs and skills (numpy set ops)"""
+        roles = np.array([], dtype=object)
+        for df in (self.resumes_df, self.jd_df, self.skills_df):
+            roles = np.union1d(roles, np.asarray(df['role'].dropna().unique(), dtype=object))
+        return roles.tolist()
+    
     def get_all_unique_roles(self) -> List[str]:
-        """Get all unique roles in the dataset"""
-        roles = set()
-        roles.update(self.resumes_df['role'].unique())
-        roles.update(self.jd_df['role'].unique())
-        roles.update(self.skills_df['role'].unique())
-        return sorted(list(roles))
+        """Get all unique roles in the dataset (computed once at load time)"""
+        return list(self._unique_roles)
     
-    def create_chunks(self, chunk_size: int = 500) -> List[Tuple[str, Dict]]:
+    def create_chunks(self, chunk_size: int = 500) -> Tuple[List[str], List[Dict]]:
         """
         Create text chunks from data with metadata
-        Returns: List of (text_chunk, metadata) tuples
+        Resume and job description texts are split on sentence boundaries into
+        ~chunk_size-character chunks so each indexed chunk is self-contained
+        Returns: (texts, metadata) parallel lists, metadata[i] describes texts[i]
         """
-        chunks = []
+        texts = []
+        metadata = []
         
         # Process resumes
-        for _, row in self.resumes_df.iterrows():
-            text = row.get('text', '')
-            if text and len(text) > 0:
-                metadata = {
-                    'source': 'resume',
-                    'role': row.get('role'),
-                    'experience_type': row.get('experience_type'),
-                    'type': row.get('experience_type')
-                }
-                chunks.append((text, metadata))
+        self._frame_chunks(
+            texts, metadata,
+            self.resumes_df,
+            self.resumes_df['text'],
+            'resume',
+            {'role': 'role', 'experience_type': 'experience_type', 'type': 'experience_type'},
+            chunk_size
+        )
         
         # Process job descriptions
-        for _, row in self.jd_df.iterrows():
-            text = row.get('text', '')
-            if text and len(text) > 0:
-                metadata = {
-                    'source': 'job_description',
-                    'role': row.get('role'),
-                    'job_title': row.get('job title'),
-                    'skills': row.get('skills'),
-                    'experience_type': row.get('experience_type')
-                }
-                chunks.append((text, metadata))
+        self._frame_chunks(
+            texts, metadata,
+            self.jd_df,
+            self.jd_df['text'],
+            'job_description',
+            {'role': 'role', 'job_title': 'job title', 'skills': 'skills', 'experience_type': 'experience_type'},
+            chunk_size
+        )
         
         # Process skills
-        for _, row in self.skills_df.iterrows():
-            text = f"Role: {row.get('role', '')}. Skills: {row.get('skills', '')}. Education: {row.get('education', '')}"
-            if text:
-                metadata = {
-                    'source': 'skill_mapping',
-                    'role': row.get('role'),
-                    'skills': row.get('skills'),
-                    'experience_type': row.get('experience_type')
-                }
-                chunks.append((text, metadata))
-        
-        return chunks
+        # object dtype so categorical / missing values format like an f-string
+        parts = self.skills_df[['role', 'skills', 'education']].astype(object)
+        skills_text = (
+            "Role: " + parts['role'].map(str)
+            + ". Skills: " + parts['skills'].map(str)
+            + ". Education: " + parts['education'].map(str)
+        )
+        self._frame_chunks(
+            texts, metadata,
+            self.skills_df,
+            skills_text,
+            'skill_mapping',
+            {'role': 'role', 'skills': 'skills', 'experience_type': 'experience_type'}
+        )
+        
+        return texts, metadata
+    
+    @staticmethod
+    def _frame_chunks(
+        texts: List[str],
+        metadata: List[Dict],
+        df: pd.DataFrame,
+        frame_texts: pd.Series,
+        source: str,
+        fields: Dict[str, str],
+        chunk_size: int = None
+    ) -> None:
+        """
+        Append every non-empty text of one frame and its metadata in one pass
+        fields: metadata key -> DataFrame column
+        chunk_size: if set, split each text into sentence-packed chunks sharing the row's metadata
+        """
+        mask = frame_texts.notna() & (frame_texts.astype(str).str.len() > 0)
+        frame_texts = frame_texts[mask]
+        
+        meta_df = pd.DataFrame({
+            key: df.loc[mask, column] if column in df.columns else None
+            for key, column in fields.items()
+        })
+        meta_df.insert(0, 'source', source)
+        
+        if chunk_size:
+            # One row per chunk; the repeated index repeats the metadata row
+            frame_texts = frame_texts.map(lambda t: split_into_sentence_chunks(t, chunk_size)).explode()
+            frame_texts = frame_texts[frame_texts.notna()]
+            meta_df = meta_df.loc[frame_texts.index]
+        
+        texts.extend(frame_texts.tolist())
+        metadata.extend(meta_df.to_dict('records'))
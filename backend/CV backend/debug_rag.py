@@ -4,9 +4,9 @@ import sys
 print('sys.modules os before import:', sys.modules.get('os'))
 
 try:
-    from rag_system import RAGSystem
-    r = RAGSystem()
-    r.build_index([('hello world', {'source':'debug','role':'none'})])
+    from rag_singleton import get_rag
+    r = get_rag()
+    r.build_index(['hello world'], [{'source':'debug','role':'none'}])
 except Exception:
     traceback.print_exc()
     raise
@@ -1,4 +1,4 @@
-from rag_system import RAGSystem
-r = RAGSystem()
+from rag_singleton import get_rag
+r = get_rag()
 print('use_openai=', r.use_openai)
-print('load_index:', r.load_index('./faiss_index'))
+print('index loaded:', r.index is not None)
@@ -6,17 +6,15 @@ print('FAISS_INDEX_PATH=', FAISS_INDEX_PATH)
 
 try:
     from data_loader import DataLoader
-    from rag_system import RAGSystem
+    from rag_singleton import get_rag
 
     dl = DataLoader(data_dir=DATA_DIR)
     dl.load_all_data()
     print('Data loaded OK')
 
-    rag = RAGSystem()
+    rag = get_rag()
     print('RAGSystem initialized OK')
-
-    ok = rag.load_index(FAISS_INDEX_PATH)
-    print('load_index returned', ok)
+    print('index loaded:', rag.index is not None)
 
 except Exception as e:
     print('Exception during diag_startup:')
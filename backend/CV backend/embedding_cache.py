@@ -0,0 +1,186 @@
+"""
+Embedding cache module
+Two-level (in-memory LRU + on-disk SQLite) cache for text embeddings
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+import numpy as np
+
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_SIZE, EMBEDDING_DISK_CACHE_SIZE
+
+
+class EmbeddingCache:
+    """
+    Wraps an encode function so repeated texts skip the model entirely.
+    Lookup order: memory -> disk -> model (misses are encoded in one batch
+    and written back to both levels). Both levels are LRU: the disk cache
+    keeps at most disk_maxsize rows, pruning the least recently used.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        model_name: str,
+        cache_dir: str = EMBEDDING_CACHE_DIR,
+        maxsize: int = EMBEDDING_CACHE_SIZE,
+        disk_maxsize: int = EMBEDDING_DISK_CACHE_SIZE
+    ):
+        self.encode_fn = encode_fn
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_rows = 0
+
+        self._db = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(cache_dir, "embeddings.sqlite"),
+                check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB, last_access REAL NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")]
+            if "last_access" not in columns:
+                # Cache file written before eviction existed
+                self._db.execute(
+                    "ALTER TABLE embeddings ADD COLUMN last_access REAL NOT NULL DEFAULT 0"
+                )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+            self._db.commit()
+            self._disk_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        except (OSError, sqlite3.Error) as e:
+            # Disk cache is an optimization only; keep working in memory
+            print(f"⚠ Embedding disk cache unavailable: {e}")
+            self._db = None
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, returning a (len(texts), dim) float32 array"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [self._key(text) for text in texts]
+        vectors = [None] * len(texts)
+
+        with self._lock:
+            # Level 1: in-process LRU
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    vectors[i] = vector
+
+            # Level 2: on-disk SQLite
+            if self._db is not None:
+                self._read_disk(keys, vectors)
+
+        # Level 3: the model, batched over all remaining misses
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            encoded = self.encode_fn([texts[i] for i in missing])
+            encoded = np.asarray(encoded, dtype=np.float32)
+
+            with self._lock:
+                for row, i in enumerate(missing):
+                    vectors[i] = encoded[row]
+                    self._remember(keys[i], encoded[row])
+
+                if self._db is not None:
+                    self._write_disk(
+                        [(keys[i], encoded[row].tobytes()) for row, i in enumerate(missing)]
+                    )
+
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def _read_disk(self, keys: List[str], vectors: list) -> None:
+        """Fill missing vectors from SQLite; errors (e.g. a locked file) count as misses"""
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        hits = []
+        try:
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    [keys[i] for i in batch]
+                ).fetchall()
+                found = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+                for i in batch:
+                    if keys[i] in found:
+                        vectors[i] = found[keys[i]]
+                        self._remember(keys[i], vectors[i])
+                        hits.append(keys[i])
+            
+            if hits:
+                # Refresh recency so pruning drops the least recently used rows
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in hits]
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠ Failed to read embedding cache: {e}")
+            self._rollback()
+    
+    def _write_disk(self, rows: List[tuple]) -> None:
+        """Store (key, vector bytes) rows, then prune past disk_maxsize"""
+        now = time.time()
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, blob, now) for key, blob in rows]
+            )
+            self._db.commit()
+            self._disk_rows += len(rows)
+            
+            if self._disk_rows > self.disk_maxsize:
+                # Recount (other processes share the file), then drop the oldest 10%
+                self._disk_rows = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                excess = self._disk_rows - int(self.disk_maxsize * 0.9)
+                if self._disk_rows > self.disk_maxsize and excess > 0:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                        (excess,)
+                    )
+                    self._db.commit()
+                    self._disk_rows -= excess
+        except sqlite3.Error as e:
+            print(f"⚠ Failed to write embedding cache: {e}")
+            self._rollback()
+    
+    def _rollback(self) -> None:
+        """End a failed transaction so it doesn't keep the file locked"""
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+    
+    def close(self) -> None:
+        """Close the on-disk cache"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -48,7 +48,7 @@ def build_index():
     
     try:
         from data_loader import DataLoader
-        from rag_system import RAGSystem
+        from rag_singleton import get_rag
         
         # Load data
         data_loader = DataLoader(data_dir="./")
@@ -56,13 +56,14 @@ def build_index():
         
         # Create chunks
         print("   Creating chunks from data...")
-        chunks = data_loader.create_chunks()
-        print(f"   Generated {len(chunks)} chunks")
+        from config import CHUNK_SIZE
+        texts, metadata = data_loader.create_chunks(chunk_size=CHUNK_SIZE)
+        print(f"   Generated {len(texts)} chunks")
         
         # Build index
         print("   Building FAISS index (this may take a minute)...")
-        rag_system = RAGSystem()
-        rag_system.build_index(chunks)
+        rag_system = get_rag()
+        rag_system.build_index(texts, metadata)
         rag_system.save_index("./faiss_index")
         
         print("   ✓ Index built successfully")
@@ -77,14 +78,15 @@ def test_rag():
     print("\n🔍 Testing RAG retrieval...")
     
     try:
-        from rag_system import RAGSystem
+        from rag_singleton import get_rag
         
-        rag_system = RAGSystem()
+        # Reuses the already-loaded embedding model; reloads the saved index from disk
+        rag_system = get_rag()
         if rag_system.load_index("./faiss_index"):
             results = rag_system.retrieve_context("software engineer", k=3)
             print(f"   ✓ Retrieved {len(results)} chunks")
             for i, result in enumerate(results, 1):
-                print(f"     {i}. {result['metadata'].get('source')} (similarity: {result['similarity_score']:.2f})")
+                print(f"     {i}. {result.source} (similarity: {result.similarity_score:.2f})")
             return True
         else:
             print("   ✗ Failed to load index")
@@ -1,5 +1,5 @@
-from config import FAISS_INDEX_PATH
-from rag_system import RAGSystem
+import asyncio
+from rag_singleton import get_rag
 from llm_service import LLMService
 
 # Sample inputs
@@ -9,8 +9,8 @@ company_name = "Acme Corp"
 candidate_profile = "5 years in ML, Python, PyTorch, deployed models in production"
 
 print('Loading RAG system and FAISS index...')
-rag = RAGSystem()
-loaded = rag.load_index(FAISS_INDEX_PATH)
+rag = get_rag()
+loaded = rag.index is not None
 print('Index loaded:', loaded)
 
 query = f"{role} {company_name} {job_description}"
@@ -28,7 +28,7 @@ except Exception as e:
     print('LLMService init failed (will still attempt fallback):', e)
     # Create a dummy object with generate_cover_letter method that invokes fallback
     class DummyLLM:
-        def generate_cover_letter(self, resume_content, job_description, company_name, job_role, retrieved_context):
+        async def generate_cover_letter(self, resume_content, job_description, company_name, job_role, retrieved_context):
             from llm_service import LLMService as _LLM
             return _LLM()._simple_template_generate(resume_content, job_description, company_name, job_role, retrieved_context)
         def validate_output(self, text):
@@ -36,13 +36,13 @@ except Exception as e:
             return _LLM().validate_output(text)
     llm = DummyLLM()
 
-cover = llm.generate_cover_letter(
+cover = asyncio.run(llm.generate_cover_letter(
     resume_content=candidate_profile,
     job_description=job_description,
     company_name=company_name,
     job_role=role,
     retrieved_context=retrieved
-)
+))
 
 print('\n--- GENERATED COVER LETTER ---\n')
 print(cover)
@@ -4,15 +4,29 @@ RAG-enabled with LLM integration
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
 from datetime import datetime
+from cachetools import TTLCache
 
 from data_loader import DataLoader
-from rag_system import RAGSystem
+from rag_singleton import get_rag
 from llm_service import LLMService
-from config import API_HOST, API_PORT, DATA_DIR, FAISS_INDEX_PATH
+from config import (
+    API_HOST,
+    API_PORT,
+    API_WORKERS,
+    DATA_DIR,
+    FAISS_INDEX_PATH,
+    CHUNK_SIZE,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+)
 from utils import format_retrieved_chunks
 
 # ============================================================================
@@ -48,10 +62,19 @@ class RolesResponse(BaseModel):
 # Initialize FastAPI
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup before serving and shutdown after (once per worker process)"""
+    await startup_event()
+    yield
+    await shutdown_event()
+
 app = FastAPI(
     title="Cover Letter Generator API",
     description="RAG-enabled AI cover letter generation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -71,11 +94,18 @@ data_loader = None
 rag_system = None
 llm_service = None
 
+# LRU (with expiry) of successful generate responses, keyed by endpoint + request hash
+response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+def _cache_key(endpoint: str, request: BaseModel) -> str:
+    """Stable hash of an endpoint name and its request payload"""
+    payload = request.model_dump_json()
+    return f"{endpoint}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
 # ============================================================================
 # Startup & Shutdown
 # ============================================================================
 
-@app.on_event("startup")
 async def startup_event():
     """Initialize systems on startup"""
     global data_loader, rag_system, llm_service
@@ -90,12 +120,12 @@ async def startup_event():
         
         # Initialize RAG system
         print("🔍 Initializing RAG system...")
-        rag_system = RAGSystem()
+        # Shared singleton: model loaded once, existing index memory-mapped;
+        # do not attempt to rebuild automatically
+        rag_system = get_rag()
         
-        # Try to load existing index; do not attempt to rebuild automatically
         if os.path.exists(FAISS_INDEX_PATH):
-            print("📦 Loading existing FAISS index...")
-            if rag_system.load_index(FAISS_INDEX_PATH):
+            if rag_system.index is not None:
                 print("✓ FAISS index loaded successfully")
             else:
                 print("⚠ Failed to load index. Please run `python init.py` to rebuild the index manually.")
@@ -117,12 +147,17 @@ async def startup_event():
         print(f"\n❌ Startup failed: {e}\n")
         raise
 
+async def shutdown_event():
+    """Release resources on shutdown"""
+    if rag_system is not None:
+        rag_system.embedding_cache.close()
+
 def build_rag_index():
     """Build FAISS index from data"""
     global rag_system
     
-    chunks = data_loader.create_chunks()
-    rag_system.build_index(chunks)
+    texts, metadata = data_loader.create_chunks(chunk_size=CHUNK_SIZE)
+    rag_system.build_index(texts, metadata)
     rag_system.save_index(FAISS_INDEX_PATH)
 
 # ============================================================================
@@ -171,18 +206,29 @@ async def generate_cover_letter(request: CoverLetterRequest) -> CoverLetterRespo
                 error="RAG system not initialized"
             )
         
-        # Step 1: Retrieve relevant context
+        cache_key = _cache_key("generate-cover-letter", request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            print(f"\n📌 Serving cached cover letter for: {request.job_role} at {request.company_name}")
+            return cached
+        
+        # Step 1: Retrieve relevant context (embedding + FAISS run off the event loop)
         print(f"\n📌 Generating cover letter for: {request.job_role} at {request.company_name}")
         print(f"   Retrieving top {request.top_k} context chunks...")
         
-        query = f"{request.job_role} {request.company_name} {request.job_description}"
-        retrieved_context = rag_system.retrieve_context(query, k=request.top_k)
+        retrieved_context = await asyncio.to_thread(
+            rag_system.retrieve_for_job,
+            request.job_role,
+            request.company_name,
+            k=request.top_k,
+            job_description=request.job_description
+        )
         
         print(f"   ✓ Retrieved {len(retrieved_context)} context chunks")
         
         # Step 2: Generate cover letter
         print("   Generating cover letter with LLM...")
-        cover_letter = llm_service.generate_cover_letter(
+        cover_letter, used_fallback = await llm_service.generate_cover_letter_with_status(
             resume_content=request.resume_content,
             job_description=request.job_description,
             company_name=request.company_name,
@@ -197,13 +243,17 @@ async def generate_cover_letter(request: CoverLetterRequest) -> CoverLetterRespo
         print(f"   ✓ Generated {word_count} words")
         print(f"   ✓ Valid format: {validation['valid']}")
         
-        return CoverLetterResponse(
+        response = CoverLetterResponse(
             success=True,
             cover_letter=cover_letter,
             word_count=word_count,
             retrieved_context_count=len(retrieved_context),
             generation_timestamp=datetime.now().isoformat()
         )
+        if not used_fallback:
+            # Template letters are a stopgap; retry the LLM on the next request
+            response_cache[cache_key] = response
+        return response
         
     except Exception as e:
         print(f"\n❌ Error generating cover letter: {str(e)}\n")
@@ -212,6 +262,45 @@ async def generate_cover_letter(request: CoverLetterRequest) -> CoverLetterRespo
             error=f"Generation failed: {str(e)}"
         )
 
+@app.post("/generate-cover-letter/stream")
+async def generate_cover_letter_stream(request: CoverLetterRequest):
+    """
+    Stream a cover letter as Server-Sent Events, one event per paragraph
+    
+    Paragraphs are post-processed before they are sent; an `end` event
+    marks completion
+    """
+    if llm_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="LLM service not initialized. Set OPENAI_API_KEY environment variable."
+        )
+    
+    if rag_system is None or rag_system.index is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    retrieved_context = await asyncio.to_thread(
+        rag_system.retrieve_for_job,
+        request.job_role,
+        request.company_name,
+        k=request.top_k,
+        job_description=request.job_description
+    )
+    
+    async def event_stream():
+        async for paragraph in llm_service.stream_cover_letter(
+            resume_content=request.resume_content,
+            job_description=request.job_description,
+            company_name=request.company_name,
+            job_role=request.job_role,
+            retrieved_context=retrieved_context
+        ):
+            lines = paragraph.rstrip("\n").split("\n")
+            yield "".join(f"data: {line}\n" for line in lines) + "\n"
+        yield "event: end\ndata: \n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.post("/generate-cover-letter-with-context")
 async def generate_with_detailed_context(request: CoverLetterRequest):
     """
@@ -222,12 +311,19 @@ async def generate_with_detailed_context(request: CoverLetterRequest):
         if rag_system is None or rag_system.index is None:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
+        cache_key = _cache_key("generate-cover-letter-with-context", request)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            # Already-serialized JSON body
+            return Response(cached, media_type="application/json")
+        
         # Retrieve context
-        query = f"{request.job_role} {request.company_name}"
-        retrieved_context = rag_system.retrieve_context(query, k=request.top_k)
+        retrieved_context = await asyncio.to_thread(
+            rag_system.retrieve_for_job, request.job_role, request.company_name, k=request.top_k
+        )
         
         # Generate cover letter
-        cover_letter = llm_service.generate_cover_letter(
+        cover_letter, used_fallback = await llm_service.generate_cover_letter_with_status(
             resume_content=request.resume_content,
             job_description=request.job_description,
             company_name=request.company_name,
@@ -237,21 +333,26 @@ async def generate_with_detailed_context(request: CoverLetterRequest):
         
         validation = llm_service.validate_output(cover_letter)
         
-        return {
+        # Returning a response object skips FastAPI's jsonable_encoder pass;
+        # orjson serializes the nested dicts directly
+        response = ORJSONResponse({
             "success": True,
             "cover_letter": cover_letter,
             "word_count": validation['word_count'],
             "retrieved_context": [
                 {
-                    "text": chunk['text'][:300],
-                    "source": chunk['metadata'].get('source'),
-                    "role": chunk['metadata'].get('role'),
-                    "similarity_score": chunk['similarity_score']
+                    "text": chunk.text[:300],
+                    "source": chunk.source,
+                    "role": chunk.role,
+                    "similarity_score": chunk.similarity_score
                 }
                 for chunk in retrieved_context
             ],
             "timestamp": datetime.now().isoformat()
-        }
+        })
+        if not used_fallback:
+            response_cache[cache_key] = response.body
+        return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -267,21 +368,21 @@ async def get_context_by_role(
         if rag_system is None or rag_system.index is None:
             raise HTTPException(status_code=503, detail="RAG system not initialized")
         
-        results = rag_system.retrieve_by_role(role, k=limit)
+        results = await asyncio.to_thread(rag_system.retrieve_by_role, role, k=limit)
         
-        return {
+        return ORJSONResponse({
             "role": role,
             "experience_type": experience_type,
             "context_count": len(results),
             "contexts": [
                 {
-                    "text": r['text'][:300],
-                    "metadata": r['metadata'],
-                    "similarity_score": r['similarity_score']
+                    "text": r.text[:300],
+                    "metadata": r.metadata,
+                    "similarity_score": r.similarity_score
                 }
                 for r in results
             ]
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -290,6 +391,11 @@ async def get_context_by_role(
 # Run
 # ============================================================================
 
+def _has_module(name: str) -> bool:
+    """True if an optional server accelerator (uvloop / httptools) is installed"""
+    import importlib.util
+    return importlib.util.find_spec(name) is not None
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -297,10 +403,15 @@ if __name__ == "__main__":
     print("🎯 Cover Letter Generator API")
     print("="*70)
     
+    # Multiple workers need the app as an import string; each worker runs
+    # startup itself (per-process caches, index pages shared via mmap)
     uvicorn.run(
-        app,
+        "main:app" if API_WORKERS > 1 else app,
         host=API_HOST,
         port=API_PORT,
+        workers=API_WORKERS,
+        loop="uvloop" if _has_module("uvloop") else "asyncio",
+        http="httptools" if _has_module("httptools") else "h11",
         reload=False,
         log_level="info"
     )
@@ -0,0 +1,80 @@
+"""
+Query batcher module
+Coalesces concurrent single-query FAISS searches into one (nq, d) search
+"""
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+from config import FAISS_MAX_BATCH
+
+
+class QueryBatcher:
+    """
+    Background thread that takes every query already waiting (up to
+    max_batch) and runs them through search_fn together. It never waits
+    for more, so a lone query is searched immediately.
+    Queries are only batched with others of the same group, since a group
+    shares its search params (e.g. the role IDSelector).
+    """
+
+    def __init__(
+        self,
+        search_fn: Callable,
+        max_batch: int = FAISS_MAX_BATCH
+    ):
+        self.search_fn = search_fn
+        self.max_batch = max(1, max_batch)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="faiss-query-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        group: Hashable = None,
+        params=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search one (1, d) query; blocks until its batch has run. Returns (distances, indices)"""
+        future = Future()
+        self._queue.put((query_embedding, k, group, params, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        """Block for the first pending query, then drain whatever else is queued"""
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            groups = defaultdict(list)
+            for item in self._collect():
+                groups[item[2]].append(item)
+
+            for items in groups.values():
+                self._search_group(items)
+
+    def _search_group(self, items: list) -> None:
+        """One search for every query of a group, at the largest k requested"""
+        k = max(item[1] for item in items)
+        params: Optional[object] = items[0][3]
+        try:
+            queries = np.vstack([item[0] for item in items])
+            distances, indices = self.search_fn(queries, k, params)
+        except Exception as e:
+            for item in items:
+                item[4].set_exception(e)
+            return
+
+        for row, (_, item_k, _, _, future) in enumerate(items):
+            future.set_result((distances[row:row + 1, :item_k], indices[row:row + 1, :item_k]))
@@ -0,0 +1,19 @@
+"""
+Process-wide RAGSystem singleton
+Loads the embedding model and FAISS index once per process
+"""
+from functools import lru_cache
+
+from config import FAISS_INDEX_PATH
+from rag_system import RAGSystem
+
+
+@lru_cache(maxsize=1)
+def get_rag() -> RAGSystem:
+    """
+    Return the shared RAGSystem, loading the index (memory-mapped) if present.
+    Check `rag.index is not None` to see whether an index was loaded.
+    """
+    rag = RAGSystem()
+    rag.load_index(FAISS_INDEX_PATH, mmap=True)
+    return rag
@@ -2,18 +2,48 @@
 RAG (Retrieval Augmented Generation) System
 Manages embeddings, FAISS indexing, and chunk retrieval
 """
+import asyncio
 import numpy as np
 import pickle
 import os
-from typing import List, Tuple, Dict
+import re
+import math
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Tuple, Dict, Optional
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
+from cachetools import TTLCache
 from config import (
     FAISS_INDEX_PATH,
     METADATA_PATH,
+    LEGACY_METADATA_PATH,
     EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    OPENAI_EMBEDDING_MODEL,
+    OPENAI_EMBEDDING_BATCH_SIZE,
+    OPENAI_EMBEDDING_CONCURRENCY,
     TOP_K_CHUNKS,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    CONTEXT_CACHE_SIZE,
+    CONTEXT_CACHE_TTL,
     OPENAI_API_KEY,
+    FAISS_INDEX_TYPE,
+    FAISS_HNSW_MAX_VECTORS,
+    FAISS_IVF_ENCODING,
+    FAISS_EF_CONSTRUCTION,
+    FAISS_EF_SEARCH,
+    FAISS_NPROBE,
+    FAISS_BATCH_QUERIES,
+    FAISS_USE_GPU,
+    FAISS_GPU_MIN_VECTORS,
 )
+from embedding_cache import EmbeddingCache
+from query_batcher import QueryBatcher
 
 # Try to import SentenceTransformer; fall back to OpenAI embeddings if unavailable
 try:
@@ -24,6 +54,69 @@ except Exception:
 # Lazy import OpenAI when needed to avoid heavy imports at module load
 OpenAI = None
 
+def _run_coroutine(coro):
+    """Run a coroutine to completion from sync code, even inside a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from async code (e.g. a FastAPI handler): use a fresh loop in a worker thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+# IO_FLAG_MMAP_IFC (faiss >= 1.8) maps the vector codes of any index (HNSW storage
+# included) straight from the file; older builds only mmap IVF inverted lists
+_MMAP_IO_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# FAISS GPU search rejects larger k; such searches use the CPU index
+_GPU_MAX_K = 2048
+
+def _metadata_row(columns: Dict[str, list], idx: int) -> Dict:
+    """Metadata dict of one chunk (fields that are null for it are omitted)"""
+    meta = {}
+    for name, values in columns.items():
+        value = values[idx]
+        if value is not None and value == value:  # skip None and NaN
+            meta[name] = value
+    return meta
+
+@dataclass(slots=True)
+class RetrievalResult:
+    """
+    One retrieved chunk
+    Metadata stays in the column store until it is accessed
+    """
+    chunk_id: int
+    text: str
+    similarity_score: Optional[float]  # Cosine similarity; None when no search was run
+    rank: int
+    _columns: Dict[str, list] = field(repr=False, compare=False)
+    
+    @property
+    def metadata(self) -> Dict:
+        return _metadata_row(self._columns, self.chunk_id)
+    
+    @property
+    def source(self) -> Optional[str]:
+        return self._field('source')
+    
+    @property
+    def role(self) -> Optional[str]:
+        return self._field('role')
+    
+    def _field(self, name: str):
+        values = self._columns.get(name)
+        value = values[self.chunk_id] if values is not None else None
+        return value if value == value else None  # NaN -> None
+
+def _embedding_device() -> str:
+    """'cuda' when a GPU is visible to torch, else 'cpu'"""
+    try:
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    except Exception:
+        return 'cpu'
+
 class RAGSystem:
     def __init__(self, embedding_model_name: str = EMBEDDING_MODEL):
         self.embedding_model = None
@@ -32,7 +125,11 @@ class RAGSystem:
 
         if SentenceTransformer is not None:
             try:
-                self.embedding_model = SentenceTransformer(embedding_model_name)
+                device = _embedding_device()
+                self.embedding_model = SentenceTransformer(embedding_model_name, device=device)
+                if device == 'cuda':
+                    # FP16 weights: about half the memory and faster GPU matmuls
+                    self.embedding_model.half()
             except Exception:
                 self.embedding_model = None
 
@@ -51,62 +148,293 @@ class RAGSystem:
                 raise ValueError("OPENAI_API_KEY not set and no local embedding model available.")
             self.openai_client = _OpenAI(api_key=OPENAI_API_KEY)
             self.use_openai = True
+
+        # Route every encode through the cache so repeated texts skip the model
+        cache_model_name = OPENAI_EMBEDDING_MODEL if self.use_openai else embedding_model_name
+        self.embedding_cache = EmbeddingCache(self._encode_uncached, cache_model_name)
+        # Hot-query fast path in front of the embedding cache (no hashing, locking or disk)
+        self._embed_query_cached = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._embed_query)
+        # Retrieved context per (role, company, k, description); cleared whenever the index changes
+        self.context_cache = TTLCache(maxsize=CONTEXT_CACHE_SIZE, ttl=CONTEXT_CACHE_TTL)
+        self._context_lock = threading.Lock()
+        # Optionally coalesce concurrent searches into one FAISS call
+        self.query_batcher = QueryBatcher(self._index_search) if FAISS_BATCH_QUERIES else None
         self.index = None
-        self.metadata = []
-        self.chunks = []
+        # GPU copy of self.index for unfiltered searches (self.index stays on CPU for saving)
+        self.gpu_index = None
+        self._gpu_resources = None
+        # Chunk store, column-oriented: texts[i] plus one list per metadata field
+        self.texts = []
+        self.metadata_columns = {}
+        self.roles = []
+        self.role_to_ids = {}
+        # Per-role IDSelectorBatch and the search params using it, built once
+        self._role_selectors = {}
+        self.role_search_params = {}
+        
+    def _embed_query(self, query: str) -> bytes:
+        """Query embedding as float32 bytes (hashable, compact for lru_cache)"""
+        return self.embedding_cache.encode([query]).tobytes()
+    
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts with the underlying model (no caching)
+        Vectors are L2-normalized here, once, so cached vectors are ready for
+        inner-product (cosine) search
+        """
+        if not self.use_openai:
+            # One batched call lets the transformer run batched matmuls
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=len(texts) > 1
+            )
+            # No copy when the model already returned contiguous float32 (FP16 on GPU is upcast)
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        if len(texts) <= OPENAI_EMBEDDING_BATCH_SIZE:
+            # Use OpenAI embeddings API (single request, e.g. a query)
+            resp = self.openai_client.embeddings.create(model=OPENAI_EMBEDDING_MODEL, input=texts)
+            embeddings = np.array([r.embedding for r in resp.data], dtype=np.float32)
+        else:
+            # Large inputs: concurrent batched requests within token limits
+            embeddings = _run_coroutine(self._openai_embed_batches(texts))
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    async def _openai_embed_batches(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with concurrent OpenAI requests of OPENAI_EMBEDDING_BATCH_SIZE texts each
+        Rows are written straight into one preallocated float32 array as batches complete
+        """
+        from openai import AsyncOpenAI
+        
+        batches = [
+            texts[i:i + OPENAI_EMBEDDING_BATCH_SIZE]
+            for i in range(0, len(texts), OPENAI_EMBEDDING_BATCH_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(OPENAI_EMBEDDING_CONCURRENCY)
+        embeddings = None
         
-    def build_index(self, chunks: List[Tuple[str, Dict]]) -> None:
+        # Client per call: its connection pool is tied to this event loop
+        async with AsyncOpenAI(api_key=OPENAI_API_KEY) as client:
+            async def embed(batch_number: int, batch: List[str]) -> None:
+                nonlocal embeddings
+                async with semaphore:
+                    resp = await client.embeddings.create(model=OPENAI_EMBEDDING_MODEL, input=batch)
+                if embeddings is None:
+                    # First response tells us the dimension
+                    embeddings = np.empty((len(texts), len(resp.data[0].embedding)), dtype=np.float32)
+                start = batch_number * OPENAI_EMBEDDING_BATCH_SIZE
+                embeddings[start:start + len(resp.data)] = [r.embedding for r in resp.data]
+            
+            await asyncio.gather(*[embed(i, batch) for i, batch in enumerate(batches)])
+        
+        return embeddings
+    
+    def build_index(self, texts: List[str], metadata: List[Dict]) -> None:
         """
         Build FAISS index from chunks
-        chunks: List of (text, metadata) tuples
+        texts, metadata: parallel lists, as returned by DataLoader.create_chunks
         """
-        print(f"Building FAISS index from {len(chunks)} chunks...")
+        print(f"Building FAISS index from {len(texts)} chunks...")
         
-        self.chunks = chunks
-        texts = [chunk[0] for chunk in chunks]
-        self.metadata = [chunk[1] for chunk in chunks]
+        self.texts = list(texts)
         
-        # Generate embeddings
-        if not self.use_openai:
-            embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
-            embeddings = np.array(embeddings).astype('float32')
-        else:
-            # Use OpenAI embeddings API
-            resp = self.openai_client.embeddings.create(model="text-embedding-3-small", input=texts)
-            embeddings = [r.embedding for r in resp.data]
-            embeddings = np.array(embeddings).astype('float32')
+        # Generate unit-norm embeddings (cached texts are not re-encoded);
+        # inner product on them is cosine similarity
+        embeddings = self.embedding_cache.encode(texts)
         
-        # Create FAISS index
+        # Create approximate, quantized FAISS index (HNSW+SQ8 or IVF-PQ) instead of exhaustive search
         dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
+        index_type = self._choose_index_type(len(embeddings), dimension)
+        self.index = faiss.index_factory(dimension, index_type, faiss.METRIC_INNER_PRODUCT)
+        if hasattr(self.index, 'hnsw'):
+            self.index.hnsw.efConstruction = FAISS_EF_CONSTRUCTION
+        if not self.index.is_trained:
+            self.index.train(embeddings)
         self.index.add(embeddings)
+        self._apply_search_params()
+        # After the index exists: the per-role search params depend on its type
+        self._set_metadata_columns(self._metadata_to_columns(metadata))
+        self._copy_index_to_gpu()
+        self.clear_context_cache()
         
-        print(f"✓ Index built with {self.index.ntotal} vectors")
+        print(f"✓ Index built with {self.index.ntotal} vectors ({index_type})")
+    
+    @staticmethod
+    def _role_key(role) -> str:
+        """Normalize a role for lookup ("Software Engineer" == "software_engineer")"""
+        if not isinstance(role, str):
+            return ""
+        return re.sub(r'[\s_]+', ' ', role.strip().lower())
+    
+    @staticmethod
+    def _metadata_to_columns(metadata: List[Dict]) -> Dict[str, list]:
+        """List of metadata dicts -> {field: values}; rows without a field get None"""
+        fields = list(dict.fromkeys(key for meta in metadata for key in meta))
+        return {field: [meta.get(field) for meta in metadata] for field in fields}
+    
+    def _set_metadata_columns(self, columns: Dict[str, list]) -> None:
+        """Install metadata columns and rebuild the role lookup"""
+        self.metadata_columns = columns
+        self.roles = columns.get('role', [None] * len(self.texts))
+        self._build_role_ids()
+    
+    def _build_role_ids(self) -> None:
+        """
+        Map normalized role -> sorted int64 ids of the chunks tagged with it,
+        plus the FAISS search params restricting a search to those ids
+        """
+        role_ids = defaultdict(list)
+        for i, role in enumerate(self.roles):
+            role_ids[self._role_key(role)].append(i)
+        self.role_to_ids = {
+            role: np.array(ids, dtype='int64') for role, ids in role_ids.items() if role
+        }
+        
+        self._role_selectors = {}
+        self.role_search_params = {}
+        if self.index is None:
+            return
+        for role, ids in self.role_to_ids.items():
+            # Hash-set membership; IDSelectorArray scans the id list for every candidate
+            sel = faiss.IDSelectorBatch(ids)
+            self._role_selectors[role] = sel  # params don't keep the selector alive
+            self.role_search_params[role] = self._search_params(sel)
+    
+    def _search_params(self, sel):
+        """FAISS search parameters restricting the search to the ids accepted by sel"""
+        if hasattr(self.index, 'hnsw'):
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=FAISS_EF_SEARCH)
+        try:
+            ivf = faiss.extract_index_ivf(self.index)
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self._nprobe(ivf))
+        except RuntimeError:
+            return faiss.SearchParameters(sel=sel)
+    
+    def _index_search(self, queries: np.ndarray, k: int, params=None) -> Tuple[np.ndarray, np.ndarray]:
+        """index.search over an (nq, d) query matrix, optionally with search params"""
+        if params is None:
+            if self.gpu_index is not None and k <= _GPU_MAX_K:
+                return self.gpu_index.search(queries, k)
+            return self.index.search(queries, k)
+        return self.index.search(queries, k, params=params)
+    
+    def _copy_index_to_gpu(self) -> None:
+        """
+        Clone the index onto GPU 0 for large corpora when faiss has GPU support
+        Role-filtered searches (IDSelector params) stay on the CPU index
+        """
+        self.gpu_index = None
+        if not FAISS_USE_GPU or self.index.ntotal < FAISS_GPU_MIN_VECTORS:
+            return
+        if not hasattr(faiss, 'StandardGpuResources') or faiss.get_num_gpus() == 0:
+            return  # faiss-cpu build or no visible GPU
+        
+        try:
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+            self.gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, self.index)
+            print(f"✓ Index copied to GPU ({self.index.ntotal} vectors)")
+        except RuntimeError as e:
+            # e.g. HNSW has no GPU implementation
+            print(f"⚠ GPU index unavailable, searching on CPU: {e}")
+            self.gpu_index = None
+    
+    def _choose_index_type(self, num_vectors: int, dimension: int) -> str:
+        """Pick a faiss.index_factory string for the corpus size"""
+        if FAISS_INDEX_TYPE != "auto":
+            return FAISS_INDEX_TYPE
+        if num_vectors <= FAISS_HNSW_MAX_VECTORS:
+            return "HNSW32,SQ8"  # int8 scalar-quantized vectors: 4x smaller than FP32
+        
+        # IVF sized to the corpus: ~4*sqrt(n) lists
+        nlist = max(1, int(4 * math.sqrt(num_vectors)))
+        if FAISS_IVF_ENCODING.upper() == "SQ8":
+            return f"IVF{nlist},SQ8"  # int8 per dimension, trained min/max ranges
+        
+        # Product quantization with up to 64 sub-quantizers
+        m = min(64, max(1, dimension // 4))
+        while dimension % m:
+            m -= 1  # PQ needs m to divide the dimension
+        return f"IVF{nlist},PQ{m}"
+    
+    def _apply_search_params(self) -> None:
+        """Set query-time search knobs (efSearch / nprobe) on the current index"""
+        if hasattr(self.index, 'hnsw'):
+            self.index.hnsw.efSearch = FAISS_EF_SEARCH
+        try:
+            ivf = faiss.extract_index_ivf(self.index)
+            ivf.nprobe = self._nprobe(ivf)
+        except RuntimeError:
+            pass  # Not an IVF index
+    
+    @staticmethod
+    def _nprobe(ivf) -> int:
+        """Lists probed per query: scales with nlist, at least FAISS_NPROBE"""
+        return min(ivf.nlist, max(FAISS_NPROBE, ivf.nlist // 32))
         
     def save_index(self, index_path: str = FAISS_INDEX_PATH) -> None:
         """Save FAISS index and metadata to disk"""
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
         
-        faiss.write_index(self.index, index_path)
-        with open(METADATA_PATH, 'wb') as f:
-            pickle.dump({
-                'metadata': self.metadata,
-                'chunks': self.chunks
-            }, f)
+        # Write then rename so processes that mmap the old file keep a valid mapping
+        tmp_path = f"{index_path}.tmp"
+        faiss.write_index(self.index, tmp_path)
+        os.replace(tmp_path, index_path)
+        # Chunk store as Parquet columns (text + one column per metadata field)
+        table = pa.table({
+            'text': pa.array(self.texts, type=pa.string()),
+            **{
+                field: pa.array(values, from_pandas=True)  # NaN -> null
+                for field, values in self.metadata_columns.items()
+            }
+        })
+        pq.write_table(table, METADATA_PATH, compression='zstd')
         
         print(f"✓ Index saved to {index_path}")
         
-    def load_index(self, index_path: str = FAISS_INDEX_PATH) -> bool:
-        """Load FAISS index and metadata from disk"""
-        if not os.path.exists(index_path) or not os.path.exists(METADATA_PATH):
+    def load_index(self, index_path: str = FAISS_INDEX_PATH, mmap: bool = True) -> bool:
+        """
+        Load FAISS index and metadata from disk
+        With mmap=True the index file is mapped read-only so worker processes
+        share the same page-cache pages instead of each holding a copy
+        """
+        if not os.path.exists(index_path):
+            return False
+        if not os.path.exists(METADATA_PATH) and not os.path.exists(LEGACY_METADATA_PATH):
             return False
         
         try:
-            self.index = faiss.read_index(index_path)
-            with open(METADATA_PATH, 'rb') as f:
-                data = pickle.load(f)
-                self.metadata = data['metadata']
-                self.chunks = data['chunks']
+            if mmap:
+                try:
+                    self.index = faiss.read_index(index_path, _MMAP_IO_FLAGS)
+                except RuntimeError:
+                    # Index type without mmap support
+                    self.index = faiss.read_index(index_path)
+            else:
+                self.index = faiss.read_index(index_path)
+            
+            if self.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                # Built by an older version (L2 over unnormalized vectors)
+                print("⚠ Index uses L2 distance; run `python init.py` to rebuild it for cosine search")
+                self.index = None
+                return False
+            self._apply_search_params()
+            if os.path.exists(METADATA_PATH):
+                table = pq.read_table(METADATA_PATH)
+                self.texts = table.column('text').to_pylist()
+                self._set_metadata_columns({
+                    field: table.column(field).to_pylist()
+                    for field in table.column_names if field != 'text'
+                })
+            else:
+                self._load_legacy_metadata()
+            self._copy_index_to_gpu()
+            self.clear_context_cache()
             
             print(f"✓ Index loaded from {index_path}")
             return True
@@ -114,53 +442,104 @@ class RAGSystem:
             print(f"Error loading index: {e}")
             return False
     
-    def retrieve_context(self, query: str, k: int = TOP_K_CHUNKS) -> List[Dict]:
+    def _load_legacy_metadata(self) -> None:
+        """Read the chunk store from a metadata.pkl written by older versions"""
+        with open(LEGACY_METADATA_PATH, 'rb') as f:
+            data = pickle.load(f)
+        if 'texts' in data:
+            self.texts = data['texts']
+        else:
+            # Metadata saved before texts were stored separately
+            self.texts = [chunk[0] for chunk in data['chunks']]
+        self._set_metadata_columns(self._metadata_to_columns(data['metadata']))
+    
+    def retrieve_context(self, query: str, k: int = TOP_K_CHUNKS, role: Optional[str] = None) -> List[RetrievalResult]:
         """
         Retrieve top-k relevant chunks for a query
-        Returns: List of (chunk_text, metadata, similarity_score)
+        If role matches a role in the index, only chunks tagged with it are searched;
+        otherwise the whole index is searched
+        Returns: List of RetrievalResult, best match first
         """
         if self.index is None:
             raise ValueError("Index not initialized. Call build_index() first.")
         
-        # Encode query
-        if not self.use_openai:
-            query_embedding = self.embedding_model.encode([query])[0].astype('float32').reshape(1, -1)
+        # Encode query (already unit-norm, same as the indexed vectors)
+        query_embedding = np.frombuffer(
+            self._embed_query_cached(query), dtype='float32'
+        ).reshape(1, -1)
+        
+        # Search, restricted to the role's vectors when the role is known
+        role_key = self._role_key(role) if role else None
+        role_ids = self.role_to_ids.get(role_key) if role_key else None
+        if role_ids is not None:
+            k, params = min(k, len(role_ids)), self.role_search_params[role_key]
         else:
-            resp = self.openai_client.embeddings.create(model="text-embedding-3-small", input=[query])
-            query_embedding = np.array(resp.data[0].embedding).astype('float32').reshape(1, -1)
+            role_key, k, params = None, min(k, self.index.ntotal), None
         
-        # Search
-        distances, indices = self.index.search(query_embedding, min(k, self.index.ntotal))
+        if self.query_batcher is not None:
+            distances, indices = self.query_batcher.submit(query_embedding, k, group=role_key, params=params)
+        else:
+            distances, indices = self._index_search(query_embedding, k, params)
         
-        # Format results
-        results = []
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx == -1:  # Invalid index
-                continue
-            
-            result = {
-                'text': self.chunks[idx][0],
-                'metadata': self.metadata[idx],
-                'similarity_score': float(1 / (1 + distance)),  # Convert L2 distance to similarity
-                'rank': i + 1
-            }
-            results.append(result)
+        # Format results (metadata dicts are only built if a caller asks for them)
+        return [
+            RetrievalResult(int(idx), self.texts[idx], float(distance), i + 1, self.metadata_columns)
+            for i, (distance, idx) in enumerate(zip(distances[0], indices[0]))
+            if idx != -1  # Invalid index
+        ]
+
+    def retrieve_for_job(
+        self,
+        job_role: str,
+        company_name: str,
+        k: int = TOP_K_CHUNKS,
+        job_description: str = ""
+    ) -> List[RetrievalResult]:
+        """
+        retrieve_context for a job posting, cached for CONTEXT_CACHE_TTL seconds
+        The cache key matches role and company case-insensitively; the query
+        itself keeps the caller's casing (embeddings can be case-sensitive)
+        """
+        key = (job_role.strip().lower(), company_name.strip().lower(), k, job_description)
+        with self._context_lock:
+            cached = self.context_cache.get(key)
+        if cached is not None:
+            return cached
         
+        query = f"{job_role.strip()} {company_name.strip()}"
+        if job_description:
+            query = f"{query} {job_description}"
+        results = self.retrieve_context(query, k=k, role=job_role)
+        with self._context_lock:
+            self.context_cache[key] = results
         return results
-
-    def retrieve_by_role(self, role: str, query: str = None, k: int = TOP_K_CHUNKS) -> List[Dict]:
+    
+    def clear_context_cache(self) -> None:
+        """Drop cached retrieval results (they refer to the previous index)"""
+        with self._context_lock:
+            self.context_cache.clear()
+    
+    def retrieve_by_role(self, role: str, query: str = None, k: int = TOP_K_CHUNKS) -> List[RetrievalResult]:
         """
         Retrieve context filtered by role
+        Without a query (or with query == role) k chunks spread across the role's
+        chunks are returned unscored (similarity_score None); otherwise the filter runs inside FAISS (IDSelector), so only this
+        role's chunks are scored
         """
-        if query is None:
-            query = role
+        role_key = self._role_key(role)
+        role_ids = self.role_to_ids.get(role_key)
+        if role_ids is None:
+            return []
         
-        all_results = self.retrieve_context(query, k * 2)
-        
-        # Filter by role
-        role_results = [
-            r for r in all_results 
-            if r['metadata'].get('role', '').lower() == role.lower()
-        ]
+        if query is None or self._role_key(query) == role_key:
+            # Role-only lookup: the role's chunks are the answer, no embedding or search.
+            # Take k ids evenly spaced over the role's chunks; consecutive ids are
+            # usually sentence chunks of one document
+            if len(role_ids) > k:
+                role_ids = role_ids[np.linspace(0, len(role_ids) - 1, k).round().astype(int)]
+            return [
+                RetrievalResult(int(idx), self.texts[idx], None, rank, self.metadata_columns)
+                for rank, idx in enumerate(role_ids, 1)
+            ]
         
-        return role_results[:k]
+        return self.retrieve_context(query, k, role=role)
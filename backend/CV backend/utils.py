@@ -1,9 +1,14 @@
 """
 Utility functions
 """
-from typing import Dict, List
+from typing import TYPE_CHECKING, List
 import re
 
+if TYPE_CHECKING:
+    from rag_system import RetrievalResult
+
+_HEADING_RE = re.compile(r'^[A-Z][A-Z\s]+$')
+
 def extract_text_section(text: str, section_name: str) -> str:
     """Extract a specific section from resume/text"""
     lines = text.split('\n')
@@ -16,7 +21,7 @@ def extract_text_section(text: str, section_name: str) -> str:
             continue
         
         if capture:
-            if re.match(r'^[A-Z][A-Z\s]+$', line.strip()) and line.strip():
+            if _HEADING_RE.match(line.strip()) and line.strip():
                 break
             result.append(line)
     
@@ -24,32 +29,54 @@ def extract_text_section(text: str, section_name: str) -> str:
 
 def clean_text(text: str) -> str:
     """Clean text by removing extra whitespace"""
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\n\s*\n', '\n', text)
-    return text.strip()
+    # str.split() splits on the same characters as \s and drops leading/trailing
+    # runs, so this collapses all whitespace (newlines included) in one C-level pass
+    return ' '.join(text.split())
 
 def split_into_chunks(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """Split text into overlapping chunks"""
     words = text.split()
+    # Words are never empty, so every window yields a non-empty chunk
+    return [
+        ' '.join(words[i:i + chunk_size])
+        for i in range(0, len(words), chunk_size - overlap)
+    ]
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+def split_into_sentence_chunks(text: str, chunk_size: int = 500) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most ~chunk_size characters
+    A single sentence longer than chunk_size becomes its own chunk
+    """
     chunks = []
+    current = ''
+    
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > chunk_size:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
     
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = ' '.join(words[i:i + chunk_size])
-        if chunk.strip():
-            chunks.append(chunk)
+    if current:
+        chunks.append(current)
     
     return chunks
 
-def format_retrieved_chunks(chunks: List[Dict]) -> str:
+def format_retrieved_chunks(chunks: List["RetrievalResult"]) -> str:
     """Format retrieved chunks for display"""
     formatted = []
     for i, chunk in enumerate(chunks, 1):
-        source = chunk.get('metadata', {}).get('source', 'unknown')
-        similarity = chunk.get('similarity_score', 0)
-        text_preview = chunk.get('text', '')[:200]
+        source = chunk.source or 'unknown'
+        similarity = chunk.similarity_score
+        text_preview = chunk.text[:200]
+        score = f"{similarity:.2f}" if similarity is not None else "n/a"
         
         formatted.append(
-            f"[{i}] {source.upper()} (similarity: {similarity:.2f})\n{text_preview}...\n"
+            f"[{i}] {source.upper()} (similarity: {score})\n{text_preview}...\n"
         )
     
     return "\n".join(formatted)